@@ -2,10 +2,16 @@ import pygame
 import random
 import sys
 import math
-
-# Initialize Pygame
-pygame.init()
-pygame.mixer.init()
+import os
+import json
+import queue
+import threading
+import argparse
+import time
+import multiprocessing
+import struct
+import zlib
+from collections import namedtuple
 
 # Constants
 WINDOW_WIDTH = 800
@@ -33,6 +39,16 @@ DIFFICULTY_SETTINGS = {
     'Expert': {'speed': 25, 'score_multiplier': 3}
 }
 
+# Capture settings
+CAPTURE_FORMATS = ('png', 'raw')
+CAPTURE_BUFFER_COUNT = 8
+REPLAY_FRAME_RATE = 60  # output rate of frames regenerated from a replay
+
+# Threaded simulation settings
+SIMULATION_TICK_RATE = 120  # logic ticks per second
+MAX_QUEUED_TURNS = 3
+RENDER_BUFFER_COUNT = 2  # back surfaces the render thread draws into
+
 class SoundManager:
     def __init__(self):
         self.sounds = {}
@@ -74,20 +90,29 @@ class SoundManager:
 class Snake:
     def __init__(self):
         self.reset()
-        self.move_timer = 0
         self.move_delay = 100  # milliseconds between moves
+        self.turn_latency = None  # LatencyStats fed when a buffered turn takes effect
     
     def reset(self):
         self.body = [(GRID_WIDTH // 2, GRID_HEIGHT // 2)]
         self.direction = (1, 0)  # Moving right initially
         self.grow = False
+        self.move_timer = 0  # Every game starts on the same step boundary, as replays assume
         self.smooth_offset = [0, 0]  # For smooth movement animation
+        self.queued_turns = []  # (direction, input poll time) pairs waiting for the next step
     
     def move(self, dt):
         self.move_timer += dt
         if self.move_timer >= self.move_delay:
             self.move_timer = 0
             
+            # Apply at most one buffered turn per step
+            if self.queued_turns:
+                direction, polled_at = self.queued_turns.pop(0)
+                self.change_direction(direction)
+                if self.turn_latency is not None:
+                    self.turn_latency.add(time.perf_counter() - polled_at)
+            
             # Move snake
             head_x, head_y = self.body[0]
             new_head = (head_x + self.direction[0], head_y + self.direction[1])
@@ -103,6 +128,15 @@ class Snake:
         if (new_direction[0] * -1, new_direction[1] * -1) != self.direction:
             self.direction = new_direction
     
+    def queue_turn(self, new_direction, polled_at):
+        """Buffer a turn so several key presses between steps are all applied"""
+        last_direction = self.queued_turns[-1][0] if self.queued_turns else self.direction
+        if new_direction == last_direction or len(self.queued_turns) >= MAX_QUEUED_TURNS:
+            return
+        # Prevent moving into itself
+        if (new_direction[0] * -1, new_direction[1] * -1) != last_direction:
+            self.queued_turns.append((new_direction, polled_at))
+    
     def check_collision(self):
         head_x, head_y = self.body[0]
         
@@ -122,8 +156,8 @@ class Snake:
     def set_speed(self, speed):
         self.move_delay = max(50, 200 - speed * 5)
     
-    def draw(self, screen):
-        for i, (x, y) in enumerate(self.body):
+    def draw(self, screen, body=None):
+        for i, (x, y) in enumerate(self.body if body is None else body):
             rect = pygame.Rect(x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
             if i == 0:  # Head
                 pygame.draw.rect(screen, DARK_GREEN, rect)
@@ -152,8 +186,8 @@ class Apple:
                 self.position = new_pos
                 break
     
-    def draw(self, screen):
-        x, y = self.position
+    def draw(self, screen, position=None):
+        x, y = self.position if position is None else position
         center_x = x * GRID_SIZE + GRID_SIZE // 2
         center_y = y * GRID_SIZE + GRID_SIZE // 2
         radius = GRID_SIZE // 2 - 2
@@ -162,9 +196,184 @@ class Apple:
         pygame.draw.circle(screen, RED, (center_x, center_y), radius)
         pygame.draw.circle(screen, DARK_GREEN, (center_x, center_y - radius + 2), 3)
 
+# Immutable copy of everything the draw methods read, published once per tick
+GameSnapshot = namedtuple('GameSnapshot', [
+    'tick_time', 'game_state',
+    'snake_body', 'apple_position', 'score', 'high_score', 'difficulty',
+    'menu_time', 'title_pulse', 'snake_demo_segments', 'demo_apple_pos',
+    'selected_menu_index', 'selected_difficulty_index', 'mouse_pos',
+])
+
+class LatencyStats:
+    """Running count, mean and worst case of a latency measured in seconds"""
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+    
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.worst = max(self.worst, seconds)
+    
+    def report(self):
+        if not self.count:
+            return f"{self.name}: no samples"
+        mean_ms = self.total / self.count * 1000
+        return f"{self.name}: avg {mean_ms:.2f} ms, max {self.worst * 1000:.2f} ms over {self.count} samples"
+
+def encode_png(rgb, width, height):
+    """Encode packed RGB24 pixels as the bytes of a PNG file"""
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+    # Every scanline starts with filter type 0 (none)
+    stride = width * 3
+    scanlines = b''.join(b'\x00' + rgb[y * stride:(y + 1) * stride] for y in range(height))
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)  # 8-bit truecolor
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(scanlines)) + chunk(b'IEND', b''))
+
+def frame_writer(frames, free_slots, pending, results, output_dir, frame_format):
+    """Writer process: encode frames from the shared slots, then hand each slot back"""
+    frame_bytes = WINDOW_WIDTH * WINDOW_HEIGHT * 3
+    slots = memoryview(frames).cast('B')
+    frames_written = 0
+    error = None
+    raw_file = None
+
+    try:
+        if frame_format == 'raw':
+            raw_file = open(os.path.join(output_dir, 'frames.rgb'), 'wb')
+        while True:
+            job = pending.get()
+            if job is None:
+                break
+
+            kind, index, payload = job
+            if kind == 'replay':
+                path = os.path.join(output_dir, f"replay_{index:03d}.json")
+                with open(path, 'w') as f:
+                    json.dump(payload, f)
+                continue
+
+            frame = slots[payload * frame_bytes:(payload + 1) * frame_bytes]
+            if raw_file is not None:
+                raw_file.write(frame)
+            else:
+                with open(os.path.join(output_dir, f"frame_{index:06d}.png"), 'wb') as f:
+                    f.write(encode_png(frame, WINDOW_WIDTH, WINDOW_HEIGHT))
+            frames_written += 1
+            free_slots.put(payload)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        if raw_file is not None:
+            raw_file.close()
+        results.put((frames_written, error))
+
+class FrameRecorder:
+    """Copy presented frames into a ring of shared-memory slots and write them from a separate process"""
+    # Encoding runs in another process so it never holds the game's GIL
+    writer_target = staticmethod(frame_writer)
+
+    def __init__(self, output_dir, frame_format='png', buffer_count=CAPTURE_BUFFER_COUNT, frame_rate=None):
+        if frame_format not in CAPTURE_FORMATS:
+            raise ValueError(f"Unknown capture format: {frame_format}")
+        if buffer_count < 1:
+            raise ValueError(f"Capture needs at least one frame buffer, got {buffer_count}")
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.frame_format = frame_format
+        self.frame_rate = frame_rate  # None when frames follow the live, variable frame rate
+
+        # Ring of reusable RGB24 frame slots; slot indices cycle between the two queues
+        self.frame_bytes = WINDOW_WIDTH * WINDOW_HEIGHT * 3
+        self.frames = multiprocessing.RawArray('B', self.frame_bytes * buffer_count)
+        self.slots = memoryview(self.frames).cast('B')
+        self.free_slots = multiprocessing.Queue()
+        self.pending = multiprocessing.Queue()
+        self.results = multiprocessing.Queue()
+        for slot in range(buffer_count):
+            self.free_slots.put(slot)
+        self.to_bytes = getattr(pygame.image, 'tobytes', None) or pygame.image.tostring
+
+        self.frames_captured = 0
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.replays_saved = 0
+        self.error = None  # Why the writer stopped early, if it did
+
+        self.writer = multiprocessing.Process(
+            target=self.writer_target,
+            args=(self.frames, self.free_slots, self.pending, self.results, output_dir, frame_format),
+            name="FrameWriter",
+            daemon=True,
+        )
+        self.writer.start()
+
+    def writer_failed(self):
+        """Return True once the writer process has exited, recording why"""
+        if self.writer.is_alive():
+            return False
+        if self.error is None:
+            self.collect_results(timeout=0.1)
+        return True
+
+    def collect_results(self, timeout):
+        try:
+            self.frames_written, self.error = self.results.get(timeout=timeout)
+        except queue.Empty:
+            self.error = f"writer process exited with code {self.writer.exitcode}"
+
+    def capture(self, surface, block=False):
+        """Copy a frame into a free slot; drop it instead of waiting unless block is set"""
+        slot = None
+        while slot is None:
+            if self.writer_failed():
+                # No slot will ever be freed again
+                self.frames_dropped += 1
+                return False
+            try:
+                slot = self.free_slots.get(block=block, timeout=0.1 if block else None)
+            except queue.Empty:
+                if not block:
+                    self.frames_dropped += 1
+                    return False
+
+        start = slot * self.frame_bytes
+        self.slots[start:start + self.frame_bytes] = self.to_bytes(surface, 'RGB')
+        self.pending.put(('frame', self.frames_captured, slot))
+        self.frames_captured += 1
+        return True
+
+    def save_replay(self, replay):
+        """Queue a finished game's replay to be written alongside the frames"""
+        self.pending.put(('replay', self.replays_saved, replay))
+        self.replays_saved += 1
+
+    def close(self):
+        """Flush pending frames, stop the writer and report capture stats"""
+        self.pending.put(None)
+        self.writer.join()
+        if self.error is None:
+            self.collect_results(timeout=1)
+        if self.error is not None:
+            # Frames still queued when the writer stopped were never written
+            self.frames_dropped += self.frames_captured - self.frames_written
+
+        rate = f"{self.frame_rate} fps" if self.frame_rate else "variable frame rate"
+        print(f"Captured {self.frames_written} frames to {self.output_dir} "
+              f"({self.frames_dropped} dropped, format: {self.frame_format}, "
+              f"{WINDOW_WIDTH}x{WINDOW_HEIGHT}, {rate})")
+        if self.error is not None:
+            print(f"Capture stopped early: {self.error}")
+
 class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    def __init__(self, recorder=None, threaded=False):
+        self.display = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        self.screen = self.display  # Surface the draw methods target
         pygame.display.set_caption("Enhanced Snake Game")
         self.clock = pygame.time.Clock()
         self.font = pygame.font.Font(None, 36)
@@ -196,6 +405,25 @@ class Game:
         self.selected_menu_index = 0
         
         self.snake.set_speed(DIFFICULTY_SETTINGS[self.difficulty]['speed'])
+        
+        # Gameplay capture and replay recording
+        self.recorder = recorder
+        self.replay_seed = None
+        self.replay_frames = []
+        self.replaying = False
+        
+        # Snapshot the draw methods read from. In threaded mode the main thread
+        # builds the next snapshot each tick and swaps it into front_snapshot;
+        # the render thread takes the front one into view once per frame
+        self.threaded = threaded
+        self.view = self.take_snapshot(time.perf_counter())
+        self.front_snapshot = self.view
+        self.free_frames = queue.Queue()
+        self.ready_frames = queue.Queue()
+        self.input_polled_at = None  # Earliest time the keys being processed could have been pressed
+        self.input_latency = LatencyStats("Input to move")
+        self.snake.turn_latency = self.input_latency
+        self.present_latency = LatencyStats("Tick to present")
     
     def init_demo_snake(self):
         """Initialize the animated demo snake for the menu"""
@@ -205,11 +433,33 @@ class Game:
         self.demo_direction = (1, 0)
         self.demo_move_timer = 0
     
+    def take_snapshot(self, tick_time):
+        """Capture the current game state as an immutable snapshot"""
+        return GameSnapshot(
+            tick_time=tick_time,
+            game_state=self.game_state,
+            snake_body=tuple(self.snake.body),
+            apple_position=self.apple.position,
+            score=self.score,
+            high_score=self.high_score,
+            difficulty=self.difficulty,
+            menu_time=self.menu_time,
+            title_pulse=self.title_pulse,
+            snake_demo_segments=tuple(self.snake_demo_segments),
+            demo_apple_pos=self.demo_apple_pos,
+            selected_menu_index=self.selected_menu_index,
+            selected_difficulty_index=self.selected_difficulty_index,
+            mouse_pos=pygame.mouse.get_pos(),
+        )
+    
     def handle_events(self):
         mouse_pos = pygame.mouse.get_pos()
+        return self.process_events(pygame.event.get(), mouse_pos)
+    
+    def process_events(self, events, mouse_pos):
         mouse_clicked = False
 
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 return False
 
@@ -270,14 +520,14 @@ class Game:
                         self.game_state = 'MENU'
 
                 elif self.game_state == 'PLAYING':
-                    if event.key == pygame.K_UP and self.snake.direction != (0, 1):
-                        self.snake.change_direction((0, -1))
-                    elif event.key == pygame.K_DOWN and self.snake.direction != (0, -1):
-                        self.snake.change_direction((0, 1))
-                    elif event.key == pygame.K_LEFT and self.snake.direction != (1, 0):
-                        self.snake.change_direction((-1, 0))
-                    elif event.key == pygame.K_RIGHT and self.snake.direction != (-1, 0):
-                        self.snake.change_direction((1, 0))
+                    if event.key == pygame.K_UP:
+                        self.steer((0, -1))
+                    elif event.key == pygame.K_DOWN:
+                        self.steer((0, 1))
+                    elif event.key == pygame.K_LEFT:
+                        self.steer((-1, 0))
+                    elif event.key == pygame.K_RIGHT:
+                        self.steer((1, 0))
                     elif event.key == pygame.K_ESCAPE:
                         self.game_state = 'PAUSED'
 
@@ -300,6 +550,13 @@ class Game:
 
         return True
     
+    def steer(self, direction):
+        """Turn the snake; threaded mode buffers turns so none are lost between steps"""
+        if self.threaded:
+            self.snake.queue_turn(direction, self.input_polled_at)
+        else:
+            self.snake.change_direction(direction)
+    
     def handle_menu_selection(self):
         """Handle menu selection via keyboard or mouse"""
         if self.selected_menu_index == 0:  # START GAME
@@ -333,7 +590,12 @@ class Game:
                     return False
                 break
                 
-    def start_game(self):
+    def start_game(self, seed=None):
+        # Seed the RNG so the game can be replayed deterministically
+        self.replay_seed = random.randrange(2 ** 32) if seed is None else seed
+        self.replay_frames = []
+        random.seed(self.replay_seed)
+        
         self.snake.reset()
         self.apple.respawn(self.snake.body)
         self.score = 0
@@ -351,6 +613,7 @@ class Game:
         
         if self.game_state == 'PLAYING':
             self.snake.move(dt)
+            self.replay_frames.append([dt, self.snake.direction[0], self.snake.direction[1]])
             
             # Check apple collision
             if self.snake.body[0] == self.apple.position:
@@ -364,6 +627,48 @@ class Game:
                 self.game_state = 'GAME_OVER'
                 self.high_score = max(self.high_score, self.score)
                 self.sound_manager.play('collision')
+                if self.recorder is not None and not self.replaying:
+                    self.recorder.save_replay(self.get_replay())
+    
+    def get_replay(self):
+        """Return the inputs needed to replay the current game"""
+        return {
+            'seed': self.replay_seed,
+            'difficulty': self.difficulty,
+            'score': self.score,
+            'frames': self.replay_frames,
+        }
+    
+    def play_replay(self, replay):
+        """Re-simulate a recorded game as fast as the recorder can keep up"""
+        self.replaying = True
+        self.difficulty = replay['difficulty']
+        self.start_game(seed=replay['seed'])
+        
+        # Recorded frames are one per update, which is 120 per second in
+        # threaded mode and variable otherwise, so resample to a fixed rate
+        frame_ms = 1000 / REPLAY_FRAME_RATE
+        elapsed = 0
+        next_frame = 0
+        for dt, dx, dy in replay['frames']:
+            self.snake.direction = (dx, dy)
+            self.update(dt)
+            elapsed += dt
+            if elapsed < next_frame and self.game_state == 'PLAYING':
+                continue
+
+            self.view = self.take_snapshot(time.perf_counter())
+            self.draw_current_state()
+            # Repeat the frame if this update spanned several output frames;
+            # the final game over frame is always kept
+            while True:
+                if not self.recorder.capture(self.screen, block=True):
+                    return
+                next_frame += frame_ms
+                if next_frame > elapsed:
+                    break
+            if self.game_state != 'PLAYING':
+                break
     
     def update_demo_snake(self, dt):
         """Update the animated demo snake"""
@@ -404,7 +709,7 @@ class Game:
         self.draw_animated_background()
         
         # Draw animated title with pulsing effect
-        title_size = int(self.title_pulse)
+        title_size = int(self.view.title_pulse)
         title_font = pygame.font.Font(None, title_size)
         title = title_font.render("SNAKE", True, GREEN)
         title_rect = title.get_rect(center=(WINDOW_WIDTH // 2, 120))
@@ -419,7 +724,7 @@ class Game:
         self.draw_demo_snake()
         
         # Draw demo apple
-        apple_x, apple_y = self.demo_apple_pos
+        apple_x, apple_y = self.view.demo_apple_pos
         apple_center_x = apple_x * GRID_SIZE + GRID_SIZE // 2
         apple_center_y = apple_y * GRID_SIZE + GRID_SIZE // 2
         apple_radius = GRID_SIZE // 2 - 2
@@ -431,8 +736,8 @@ class Game:
         
         # Draw stats at bottom
         stats_y = WINDOW_HEIGHT - 80
-        difficulty_text = self.small_font.render(f"Difficulty: {self.difficulty}", True, YELLOW)
-        score_text = self.small_font.render(f"Best: {self.high_score}", True, WHITE)
+        difficulty_text = self.small_font.render(f"Difficulty: {self.view.difficulty}", True, YELLOW)
+        score_text = self.small_font.render(f"Best: {self.view.high_score}", True, WHITE)
         
         self.screen.blit(difficulty_text, (20, stats_y))
         score_rect = score_text.get_rect(topright=(WINDOW_WIDTH - 20, stats_y))
@@ -444,7 +749,7 @@ class Game:
         
         # Draw moving stars
         for i in range(50):
-            star_time = (self.menu_time + i * 100) * 0.001
+            star_time = (self.view.menu_time + i * 100) * 0.001
             x = int((star_time * 30 + i * 73) % WINDOW_WIDTH)
             y = int((star_time * 20 + i * 97) % WINDOW_HEIGHT)
             brightness = int(abs(math.sin(star_time + i)) * 100 + 50)
@@ -453,7 +758,7 @@ class Game:
     
     def draw_demo_snake(self):
         """Draw the animated demo snake on menu"""
-        for i, (x, y) in enumerate(self.snake_demo_segments):
+        for i, (x, y) in enumerate(self.view.snake_demo_segments):
             rect = pygame.Rect(x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
             if i == 0:  # Head
                 pygame.draw.rect(self.screen, DARK_GREEN, rect)
@@ -476,7 +781,7 @@ class Game:
         button_spacing = 20
         start_y = 320
         
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = self.view.mouse_pos
         
         for i, label in enumerate(button_labels):
             button_y = start_y + i * (button_height + button_spacing)
@@ -488,7 +793,7 @@ class Game:
             )
             
             # Check if button is selected or hovered
-            is_selected = (i == self.selected_menu_index)
+            is_selected = (i == self.view.selected_menu_index)
             is_hovered = button_rect.collidepoint(mouse_pos)
             
             # Draw button background
@@ -523,7 +828,7 @@ class Game:
             y = start_y + i * option_height
             
             # Highlight selected option
-            if i == self.selected_difficulty_index:
+            if i == self.view.selected_difficulty_index:
                 highlight_rect = pygame.Rect(100, y - 10, WINDOW_WIDTH - 200, 50)
                 pygame.draw.rect(self.screen, DARK_GREEN, highlight_rect)
                 pygame.draw.rect(self.screen, GREEN, highlight_rect, 3)
@@ -566,8 +871,8 @@ class Game:
         dim_surface.set_alpha(128)
         
         # Draw snake and apple dimmed
-        self.snake.draw(self.screen)
-        self.apple.draw(self.screen)
+        self.snake.draw(self.screen, self.view.snake_body)
+        self.apple.draw(self.screen, self.view.apple_position)
         self.screen.blit(dim_surface, (0, 0))
         
         # Draw pause menu
@@ -586,7 +891,7 @@ class Game:
             self.screen.blit(text, text_rect)
         
         # Draw current score
-        score_text = self.font.render(f"Score: {self.score}", True, WHITE)
+        score_text = self.font.render(f"Score: {self.view.score}", True, WHITE)
         self.screen.blit(score_text, (10, 10))
     
     def draw_game_over(self):
@@ -599,27 +904,27 @@ class Game:
         self.screen.blit(game_over_title, title_rect)
         
         # Draw scores
-        score_text = self.font.render(f"Final Score: {self.score}", True, WHITE)
+        score_text = self.font.render(f"Final Score: {self.view.score}", True, WHITE)
         score_rect = score_text.get_rect(center=(WINDOW_WIDTH // 2, 220))
         self.screen.blit(score_text, score_rect)
         
-        if self.score == self.high_score:
+        if self.view.score == self.view.high_score:
             new_high_text = self.font.render("NEW HIGH SCORE!", True, YELLOW)
             new_high_rect = new_high_text.get_rect(center=(WINDOW_WIDTH // 2, 260))
             self.screen.blit(new_high_text, new_high_rect)
         else:
-            high_score_text = self.font.render(f"Best Score: {self.high_score}", True, YELLOW)
+            high_score_text = self.font.render(f"Best Score: {self.view.high_score}", True, YELLOW)
             high_score_rect = high_score_text.get_rect(center=(WINDOW_WIDTH // 2, 260))
             self.screen.blit(high_score_text, high_score_rect)
         
         # Draw snake length
-        snake_length = len(self.snake.body)
+        snake_length = len(self.view.snake_body)
         length_text = self.font.render(f"Snake Length: {snake_length}", True, GREEN)
         length_rect = length_text.get_rect(center=(WINDOW_WIDTH // 2, 300))
         self.screen.blit(length_text, length_rect)
         
         # Draw difficulty
-        diff_text = self.font.render(f"Difficulty: {self.difficulty}", True, BLUE)
+        diff_text = self.font.render(f"Difficulty: {self.view.difficulty}", True, BLUE)
         diff_rect = diff_text.get_rect(center=(WINDOW_WIDTH // 2, 340))
         self.screen.blit(diff_text, diff_rect)
         
@@ -638,52 +943,207 @@ class Game:
         """Draw the main game screen"""
         self.screen.fill(BLACK)
         self.draw_grid()
-        self.snake.draw(self.screen)
-        self.apple.draw(self.screen)
+        self.snake.draw(self.screen, self.view.snake_body)
+        self.apple.draw(self.screen, self.view.apple_position)
         
         # Draw UI
-        score_text = self.font.render(f"Score: {self.score}", True, WHITE)
+        score_text = self.font.render(f"Score: {self.view.score}", True, WHITE)
         self.screen.blit(score_text, (10, 10))
         
-        high_score_text = self.small_font.render(f"Best: {self.high_score}", True, YELLOW)
+        high_score_text = self.small_font.render(f"Best: {self.view.high_score}", True, YELLOW)
         self.screen.blit(high_score_text, (10, 50))
         
-        difficulty_text = self.small_font.render(f"Difficulty: {self.difficulty}", True, BLUE)
+        difficulty_text = self.small_font.render(f"Difficulty: {self.view.difficulty}", True, BLUE)
         diff_rect = difficulty_text.get_rect(topright=(WINDOW_WIDTH - 10, 10))
         self.screen.blit(difficulty_text, diff_rect)
         
-        length_text = self.small_font.render(f"Length: {len(self.snake.body)}", True, GREEN)
+        length_text = self.small_font.render(f"Length: {len(self.view.snake_body)}", True, GREEN)
         length_rect = length_text.get_rect(topright=(WINDOW_WIDTH - 10, 40))
         self.screen.blit(length_text, length_rect)
 
 
 
-    def run(self):
-        running = True
-        while running:
-            dt = self.clock.tick(60)  # Limit to 60 FPS and get delta time in milliseconds
-            running = self.handle_events()
-            self.update(dt)
+    def draw_recording_indicator(self):
+        """Draw the capture status; drawn after capture so it stays out of the recording"""
+        if self.recorder.error is not None:
+            label = "REC FAILED"
+        elif self.recorder.frames_dropped:
+            label = f"REC ({self.recorder.frames_dropped} dropped)"
+        else:
+            label = "REC"
+        text = self.small_font.render(label, True, RED)
+        text_rect = text.get_rect(bottomright=(WINDOW_WIDTH - 10, WINDOW_HEIGHT - 10))
+        self.screen.blit(text, text_rect)
 
-            if self.game_state == 'MENU':
-                self.draw_menu()
-            elif self.game_state == 'DIFFICULTY_SELECT':
-                self.draw_difficulty_select()
-            elif self.game_state == 'PLAYING':
-                self.draw_playing()
-            elif self.game_state == 'PAUSED':
-                self.draw_paused()
-            elif self.game_state == 'GAME_OVER':
-                self.draw_game_over()
+    def draw_current_state(self):
+        if self.view.game_state == 'MENU':
+            self.draw_menu()
+        elif self.view.game_state == 'DIFFICULTY_SELECT':
+            self.draw_difficulty_select()
+        elif self.view.game_state == 'PLAYING':
+            self.draw_playing()
+        elif self.view.game_state == 'PAUSED':
+            self.draw_paused()
+        elif self.view.game_state == 'GAME_OVER':
+            self.draw_game_over()
 
-            pygame.display.flip()
+    def draw_frame(self):
+        """Draw the current snapshot to self.screen and hand it to the recorder"""
+        self.draw_current_state()
 
+        if self.recorder is not None:
+            self.recorder.capture(self.screen)
+            self.draw_recording_indicator()
+
+    def render_loop(self):
+        """Draw published snapshots into back surfaces and hand finished frames to the main thread"""
+        clock = pygame.time.Clock()
+        while self.running:
+            clock.tick(60)
+            try:
+                back = self.free_frames.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            # Take the published snapshot once so the whole frame draws one tick
+            self.view = self.front_snapshot
+            self.screen = back
+            self.draw_frame()
+            self.ready_frames.put((back, self.view))
+
+    def present_ready_frame(self):
+        """Flip the newest frame the render thread finished, if any"""
+        latest = None
+        while True:
+            try:
+                frame = self.ready_frames.get_nowait()
+            except queue.Empty:
+                break
+            if latest is not None:
+                self.free_frames.put(latest[0])
+            latest = frame
+        if latest is None:
+            return
+
+        surface, view = latest
+        self.display.blit(surface, (0, 0))
+        pygame.display.flip()
+        self.free_frames.put(surface)
+        self.present_latency.add(time.perf_counter() - view.tick_time)
+
+    def run_threaded(self):
+        # SDL only delivers events on the thread that owns the window, so the
+        # main thread polls input and ticks the game at a fixed rate, while
+        # the draw_* work runs on a render thread that can stall freely
+        self.running = True
+        for _ in range(RENDER_BUFFER_COUNT):
+            self.free_frames.put(pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)))
+        renderer = threading.Thread(target=self.render_loop, name="Renderer", daemon=True)
+        renderer.start()
+
+        tick_seconds = 1 / SIMULATION_TICK_RATE
+        last_poll = next_tick = time.perf_counter()
+        while self.running and renderer.is_alive():
+            tick_time = time.perf_counter()
+            events = pygame.event.get()
+            # A key may have been pressed any time since the previous poll, so
+            # turn latency is measured from then until the move that applies it
+            self.input_polled_at = last_poll
+            last_poll = tick_time
+            if not self.process_events(events, pygame.mouse.get_pos()):
+                self.running = False
+
+            self.update(tick_seconds * 1000)
+            self.front_snapshot = self.take_snapshot(tick_time)
+            self.present_ready_frame()
+
+            next_tick += tick_seconds
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Fell behind; resync rather than running a burst of catch-up ticks
+                next_tick = time.perf_counter()
+
+        self.running = False
+        renderer.join()
+        print(self.input_latency.report())
+        print(self.present_latency.report())
+
+    def run(self):
+        if self.threaded:
+            self.run_threaded()
+        else:
+            running = True
+            while running:
+                dt = self.clock.tick(60)  # Limit to 60 FPS and get delta time in milliseconds
+                running = self.handle_events()
+                self.update(dt)
+                self.view = self.take_snapshot(time.perf_counter())
+                self.draw_frame()
+                pygame.display.flip()
+
+        if self.recorder is not None:
+            self.recorder.close()
         pygame.quit()
         sys.exit()
 
 
+def render_replay(replay_path, output_dir, frame_format='png', buffer_count=CAPTURE_BUFFER_COUNT):
+    """Regenerate the frames of a recorded game without opening a window"""
+    with open(replay_path) as f:
+        replay = json.load(f)
+
+    # Swap to the dummy video driver so nothing is shown or vsynced, and
+    # drop the mixer so sound effects are skipped
+    pygame.display.quit()
+    pygame.mixer.quit()
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    pygame.display.init()
+
+    recorder = FrameRecorder(output_dir, frame_format, buffer_count, frame_rate=REPLAY_FRAME_RATE)
+    game = Game(recorder=recorder)
+    game.play_replay(replay)
+    recorder.close()
+    pygame.quit()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Enhanced Snake Game")
+    parser.add_argument('--record', metavar='DIR',
+                        help="capture every presented frame and finished-game replays to DIR")
+    parser.add_argument('--replay', metavar='FILE',
+                        help="render a recorded replay headlessly into the --record directory")
+    parser.add_argument('--format', choices=CAPTURE_FORMATS, default='png',
+                        help="capture as a PNG sequence or a single raw RGB24 stream (default: png)")
+    parser.add_argument('--buffers', type=int, default=CAPTURE_BUFFER_COUNT,
+                        help=f"number of frame buffers in the capture ring (default: {CAPTURE_BUFFER_COUNT})")
+    parser.add_argument('--threaded', action='store_true',
+                        help=f"draw on a separate render thread while input and logic tick at {SIMULATION_TICK_RATE} per second")
+    args = parser.parse_args()
+    if args.buffers < 1:
+        parser.error("--buffers must be at least 1")
+    return args
+
+
 def main():
-    game = Game()
+    # Initialize Pygame here rather than at import, so the capture writer
+    # process can import this module without opening an audio device
+    pygame.init()
+    pygame.mixer.init()
+
+    args = parse_args()
+
+    if args.replay:
+        if not args.record:
+            sys.exit("--replay needs --record DIR for the output frames")
+        render_replay(args.replay, args.record, args.format, args.buffers)
+        return
+
+    recorder = None
+    if args.record:
+        recorder = FrameRecorder(args.record, args.format, args.buffers)
+    game = Game(recorder=recorder, threaded=args.threaded)
     game.run()
 
 
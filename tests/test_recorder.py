@@ -0,0 +1,87 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+try:
+    import pygame
+except ImportError:
+    pygame = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if pygame is not None:
+    import game
+
+
+def slow_writer(frames, free_slots, pending, results, output_dir, frame_format):
+    """Stand-in writer that takes far longer per frame than the game does"""
+    frames_written = 0
+    while True:
+        job = pending.get()
+        if job is None:
+            break
+        kind, index, payload = job
+        if kind == 'frame':
+            time.sleep(0.05)
+            frames_written += 1
+            free_slots.put(payload)
+    results.put((frames_written, None))
+
+
+@unittest.skipIf(pygame is None, "pygame is not installed")
+class FrameRecorderTest(unittest.TestCase):
+    def setUp(self):
+        self.surface = pygame.Surface((game.WINDOW_WIDTH, game.WINDOW_HEIGHT))
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def test_slow_writer_drops_frames_instead_of_blocking(self):
+        class SlowRecorder(game.FrameRecorder):
+            writer_target = staticmethod(slow_writer)
+
+        recorder = SlowRecorder(self.output_dir, 'raw', buffer_count=2)
+        start = time.perf_counter()
+        for _ in range(120):
+            recorder.capture(self.surface)
+        elapsed = time.perf_counter() - start
+        recorder.close()
+
+        # 120 frames offered faster than 120 fps, so at most a few were written
+        self.assertLess(elapsed, 1.0)
+        self.assertGreater(recorder.frames_dropped, 0)
+        self.assertEqual(recorder.frames_written + recorder.frames_dropped, 120)
+
+    def test_frames_queued_when_writer_fails_count_as_dropped(self):
+        output_dir = os.path.join(self.output_dir, 'frames')
+        recorder = game.FrameRecorder(output_dir, 'png', buffer_count=2)
+        os.rmdir(output_dir)  # The writer can no longer save anything
+        for _ in range(3):
+            recorder.capture(self.surface)
+        recorder.close()
+
+        self.assertIsNotNone(recorder.error)
+        self.assertEqual(recorder.frames_written, 0)
+        self.assertEqual(recorder.frames_dropped, 3)
+
+    def test_png_frames_round_trip(self):
+        self.surface.fill(game.GREEN)
+        recorder = game.FrameRecorder(self.output_dir, 'png', buffer_count=1)
+        self.assertTrue(recorder.capture(self.surface, block=True))
+        recorder.close()
+
+        frame = pygame.image.load(os.path.join(self.output_dir, 'frame_000000.png'))
+        self.assertEqual(frame.get_size(), (game.WINDOW_WIDTH, game.WINDOW_HEIGHT))
+        self.assertEqual(tuple(frame.get_at((0, 0)))[:3], game.GREEN)
+
+    def test_rejects_empty_buffer_ring(self):
+        with self.assertRaises(ValueError):
+            game.FrameRecorder(self.output_dir, buffer_count=0)
+
+
+if __name__ == '__main__':
+    unittest.main()